@@ -16,6 +16,11 @@ LICENSE
 import pathlib
 import argparse
 import re
+import os
+import io
+import shutil
+from typing import Any
+from concurrent.futures import ProcessPoolExecutor, as_completed
 
 # Messaging/logging
 import logging
@@ -28,13 +33,30 @@ except Exception:
 
 #
 import pandas as pd
+import zipfile
 from zipfile import ZipFile
 from PIL import Image
 
+# Use ISA-L for the deflate decompression and the CRC check if available (same API as zlib)
+try:
+    from isal import isal_zlib
+except ImportError:
+    isal_zlib = None
+
+if isal_zlib is not None:
+    # NOTE: zipfile binds crc32 at import time, so it has to be replaced on its own
+    setattr(zipfile, "zlib", isal_zlib)
+    setattr(zipfile, "crc32", isal_zlib.crc32)
+
 ###############################################################################
 # global constants
 ###############################################################################
 LEVEL = [logging.WARNING, logging.INFO, logging.DEBUG]
+TRACK_RE = re.compile(r"([0-9]{2}) (.*)")
+COVER_NAMES = ("cover.jpg", "cover.png")
+COPY_BUFFER_SIZE = 1 << 22  # 4 MiB, tracks are usually tens of MB
+CSV_CHUNK_SIZE = 64
+JPEG_SAVE_OPTIONS: dict[str, Any] = dict(quality=85, optimize=False, progressive=False)
 
 ###############################################################################
 # Functions
@@ -128,6 +150,9 @@ def define_argument_parser() -> argparse.ArgumentParser:
 
 
     # Add performative options
+    parser.add_argument(
+        "-j", "--nb_jobs", default=os.cpu_count(), type=int, help="The number of albums to import in parallel"
+    )
     parser.add_argument("-s", "--separator", default="\t", help="The separator of the CSV/TSV/PSV/... files")
 
     # Add arguments
@@ -139,62 +164,117 @@ def define_argument_parser() -> argparse.ArgumentParser:
     return parser
 
 
-###############################################################################
-# Entry point
-###############################################################################
-def main():
-    # Initialization of the argument parser and the logger
-    arg_parser = define_argument_parser()
-    args = arg_parser.parse_args()
-    logger = configure_logger(args)
-
-    input_dir = pathlib.Path(args.input_dir)
-    output_dir = pathlib.Path(args.output_dir)
-    df = pd.read_csv(args.input_csv, sep=args.separator)
+def _process_album(artist: str, album: str, year: int, input_dir: pathlib.Path, output_dir: pathlib.Path):
+    """Unpack one album archive, rename its tracks and generate its covers
 
-    for r in df.iterrows():
-        logger.info(f"Import \"{r[1]['Artist']}\" from \"{r[1]['Album']}\"")
+    Parameters
+    ----------
+    artist : str
+        The artist name
+    album : str
+        The album name
+    year : int
+        The release year of the album
+    input_dir : pathlib.Path
+        The directory containing the zip files downloaded from bandcamp
+    output_dir : pathlib.Path
+        The root directory which will contain the music unpacked and organized
+    """
+    logger = logging.getLogger(__name__)
+    debug = logger.isEnabledFor(logging.DEBUG)
+    logger.info(f"Import \"{artist}\" from \"{album}\"")
 
-        # Generate directory
-        album_dir = output_dir/f"{r[1]['Artist']}/{r[1]['Year']} - {r[1]['Album']}"
+    # Generate directory
+    album_dir = output_dir/f"{artist}/{year} - {album}"
+    if debug:
         logger.debug("")
         logger.debug(f"Create directory \"{album_dir}\"")
-        album_dir.mkdir(exist_ok=True, parents=True)
+    album_dir.mkdir(exist_ok=True, parents=True)
 
-        # Extract zip
-        zip_file = input_dir/f"{r[1]['Artist']} - {r[1]['Album']}.zip"
+    # Extract zip and rename the tracks on the fly
+    zip_file = input_dir/f"{artist} - {album}.zip"
+    if debug:
         logger.debug(f"Extract \"{zip_file}\"")
-        with ZipFile(zip_file, 'r') as zipObj:
-            zipObj.extractall(album_dir)
-
-        # Rename file
-        for track in album_dir.glob('*.flac'):
-            m = re.search("([0-9]{2}) (.*)", track.stem)
+    with ZipFile(zip_file, 'r') as zipObj:
+        names = zipObj.namelist()
+        cover_name = next((n for n in COVER_NAMES if n in names), None)
+        if cover_name is None:
+            raise FileNotFoundError(f"No cover found in \"{zip_file}\"")
+
+        # Keep the cover in memory as it is decoded right after
+        cover_bytes = zipObj.read(cover_name)
+        (album_dir/cover_name).write_bytes(cover_bytes)
+
+        for name in names:
+            if name == cover_name:
+                continue
+
+            # Anything which is not a track at the root of the archive is extracted as is, letting zipfile sanitize
+            # the path (NOTE: backslashes are separators on Windows)
+            if ("/" in name) or ("\\" in name) or (not name.endswith('.flac')):
+                zipObj.extract(name, album_dir)
+                continue
+
+            m = TRACK_RE.search(name[:-len('.flac')])
             if m is None:
-                raise Exception(f"Bad format for track \"{track}\"")
+                raise Exception(f"Bad format for track \"{name}\" in \"{zip_file}\"")
             filename = f"{m[1]} - {m[2]}.flac"
 
-            logger.debug(f"Rename track \"{track.name}\" -> \"{filename}\"")
-            track.rename(album_dir/filename)
+            if debug:
+                logger.debug(f"Extract track \"{name}\" -> \"{filename}\"")
+            with zipObj.open(name) as src, open(album_dir/filename, 'wb') as dst:
+                shutil.copyfileobj(src, dst, COPY_BUFFER_SIZE)
 
-        # Generate proper covers
-        try:
-            image = Image.open(f'{album_dir}/cover.jpg')
-        except FileNotFoundError:
-            image = Image.open(f'{album_dir}/cover.png')
+    # Generate proper covers
+    image = Image.open(io.BytesIO(cover_bytes))
 
-        image = image.convert("RGB")
+    # Let libjpeg decode directly at a reduced scale (no-op for non-JPEG covers)
+    image.draft("RGB", (240, 240))
+    image = image.convert("RGB")
 
-        image = image.resize((120, 120))
-        image.save(f'{album_dir}/cover_med.jpg')
+    # NOTE: bilinear is good enough for thumbnails and the encoder does not need any extra pass
+    med = image.resize((120, 120), Image.Resampling.BILINEAR)
+    med.save(album_dir/'cover_med.jpg', 'JPEG', **JPEG_SAVE_OPTIONS)
 
-        image = image.resize((60, 60))
-        image.save(f'{album_dir}/cover_small.jpg')
+    small = med.resize((60, 60), Image.Resampling.BILINEAR)
+    small.save(album_dir/'cover_small.jpg', 'JPEG', **JPEG_SAVE_OPTIONS)
 
 
+    if debug:
         logger.debug("")
         logger.debug("===============================================================")
 
+
+###############################################################################
+# Entry point
+###############################################################################
+def main():
+    # Initialization of the argument parser and the logger
+    arg_parser = define_argument_parser()
+    args = arg_parser.parse_args()
+    logger = configure_logger(args)
+
+    input_dir = pathlib.Path(args.input_dir)
+    output_dir = pathlib.Path(args.output_dir)
+
+    # Each album is independent, so dispatch them over a pool of processes while the CSV is still being read
+    # NOTE: the workers are not necessarily forked, so the logging has to be configured in each of them
+    with ProcessPoolExecutor(max_workers=args.nb_jobs, initializer=configure_logger, initargs=(args,)) as executor:
+        futures = dict()
+        for chunk in pd.read_csv(args.input_csv, sep=args.separator, chunksize=CSV_CHUNK_SIZE):
+            records = chunk[["Artist", "Album", "Year"]].itertuples(index=False, name=None)
+            for artist, album, year in records:
+                future = executor.submit(_process_album, artist, album, year, input_dir, output_dir)
+                futures[future] = (artist, album)
+
+        # Stop the import at the first failing album
+        for future in as_completed(futures):
+            if future.exception() is not None:
+                artist, album = futures[future]
+                logger.error(f"Import of \"{album}\" from \"{artist}\" failed, cancelling the remaining albums")
+                executor.shutdown(wait=True, cancel_futures=True)
+                future.result()
+
 ###############################################################################
 # Wrapping for directly calling the scripts
 ###############################################################################
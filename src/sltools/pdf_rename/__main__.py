@@ -13,6 +13,7 @@ LICENSE
 """
 
 # System/default
+import os
 import pathlib
 
 # Arguments
@@ -22,9 +23,6 @@ import argparse
 import logging
 from logging.config import dictConfig
 
-# Shell
-import shutil
-
 from .metadata import Metadata, MetadataExtractor
 
 
@@ -154,12 +152,12 @@ def main():
     input_pdf = pathlib.Path(args.input_pdf)
     output_dir = input_pdf.parent
 
-    extractor = MetadataExtractor(input_pdf, args.arxiv_id, args.doi, args.title, args.no_text_search)
-    metadata = extractor.extract_metadata()
+    with MetadataExtractor(input_pdf, args.arxiv_id, args.doi, args.title, args.no_text_search) as extractor:
+        metadata = extractor.extract_metadata()
 
     final_name = metadata.generate_pdf_filename()
     if not args.dry_run:
-        shutil.move(input_pdf, output_dir / final_name)
+        os.replace(input_pdf, output_dir / final_name)
         logger.info(f"{input_pdf} renamed to {output_dir}/{final_name}")
     else:
         logger.info(f"[dry-run] {input_pdf} renamed to {output_dir}/{final_name}")
@@ -1,23 +1,28 @@
 import logging
 import re
 import pathlib
+from typing import TYPE_CHECKING
 
 # Papers
-from papers.extract import pdfhead
 from papers.extract import fetch_bibtex_by_doi, fetch_bibtex_by_arxiv, fetch_bibtex_by_fulltext_scholar
-from papers.encoding import standard_name, family_names
-from papers.encoding import standard_name, family_names
+from papers.encoding import standard_name
 
-import pymupdf
 import bibtexparser
 
+# pymupdf is heavy to load and not needed when the DOI or the arxiv ID is given
+if TYPE_CHECKING:
+    import pymupdf
+
 DOI_REGEXP = r"10\.\d{4,9}\/[-._;()/:A-Za-z0-9]+[A-Za-z0-9]"
+DOI_RE = re.compile(DOI_REGEXP)
 
 
-def first_names(author: str) -> list[str]:
-    """Extract firstnames from the AUTHOR parameters."""
+def split_names(author: str) -> tuple[list[str], list[str]]:
+    """Extract the family names and the first names from the AUTHOR parameter, normalizing it only once."""
     authors = standard_name(author).split(" and ")
-    return [nm.split(",")[1].strip() for nm in authors]
+    fam_names = [nm.split(",")[0] for nm in authors]
+    fir_names = [nm.split(",")[1].strip() for nm in authors]
+    return fam_names, fir_names
 
 
 def fix_title(title: str) -> str:
@@ -26,18 +31,24 @@ def fix_title(title: str) -> str:
     return re.sub(r'[\'"‘’]', "", title)
 
 
+def parse_bibtex_entry(bibtex_str: str) -> dict:
+    """Parse the BIBTEX_STR and return its first entry."""
+    bib = bibtexparser.loads(bibtex_str)
+    return bib.entries[0]
+
+
 class Metadata:
-    def __init__(self, bibtex_str: str):
-        bib = bibtexparser.loads(bibtex_str)
-        entry = bib.entries[0]
+    def __init__(self, bibtex_str: str, entry: dict | None = None):
+        # The entry can be given if bibtex_str has already been parsed
+        if entry is None:
+            entry = parse_bibtex_entry(bibtex_str)
 
         self._content = entry
 
     def generate_pdf_filename(self) -> str:
         # Generate accurate format for author
-        fam_names = family_names(self._content.get("author", "unknown").lower())
         try:
-            fir_names = first_names(self._content.get("author", "unknown").lower())
+            fam_names, fir_names = split_names(self._content.get("author", "unknown").lower())
         except Exception:
             raise Exception(
                 'The following author self._content doesn\'t contain proper author names: "%s"'
@@ -66,13 +77,31 @@ class MetadataExtractor:
     ):
         self._logger = logging.getLogger(self.__class__.__name__)
         self._pdf_path: pathlib.Path = pdf_path
+        self._pdf_str: str = str(pdf_path.resolve())
         self._arxiv_id: str | None = arxiv_id
         self._doi: str | None = doi
         self._title: str | None = title
         self._no_text_search: bool = disable_text_search
 
+        # The PDF is opened and parsed once, lazily, and shared by all the extraction steps
+        self._doc: "pymupdf.Document | None" = None
+        self._first_page_text: str | None = None
+
+    def __enter__(self) -> "MetadataExtractor":
+        return self
+
+    def __exit__(self, *_):
+        self.close()
+
+    def close(self):
+        """Release the PDF document if it has been opened."""
+        if self._doc is not None:
+            self._doc.close()
+            self._doc = None
+
     def extract_metadata(self) -> Metadata:
         bibtex_str = None
+        entry = None
         if self._arxiv_id is not None:
             bibtex_str = fetch_bibtex_by_arxiv(self._arxiv_id)
         else:
@@ -92,26 +121,42 @@ class MetadataExtractor:
             if self._title is not None:
                 query_text = self._title.lower().strip()
             else:
-                query_text = pdfhead(str(self._pdf_path.resolve()), 1, 100, image=False)
+                query_text = self._get_first_page_text()
 
             bibtex_str = fetch_bibtex_by_fulltext_scholar(query_text)
             if bibtex_str is not None:
-                bib = bibtexparser.loads(bibtex_str)
-                entry = bib.entries[0]
-                title = entry["title"]
-                if (self._title is not None) and (title.lower().strip() != self._title.lower().strip()):
-                    raise Exception(f"The retrieved entry is not the correct one, retrieved title: {title}")
+                # The entry only needs to be parsed here to validate the overridden title
+                if self._title is not None:
+                    entry = parse_bibtex_entry(bibtex_str)
+                    title = entry["title"]
+                    if title.lower().strip() != self._title.lower().strip():
+                        raise Exception(f"The retrieved entry is not the correct one, retrieved title: {title}")
 
-                self._logger.debug(f"google scholar do provide some bibtex_str: {bibtex_str}")
+                if self._logger.isEnabledFor(logging.DEBUG):
+                    self._logger.debug(f"google scholar do provide some bibtex_str: {bibtex_str}")
 
         if bibtex_str is None:
             raise Exception(f'Could not find any metadata for "{self._pdf_path}"')
 
-        return Metadata(bibtex_str)
+        return Metadata(bibtex_str, entry)
+
+    def _get_document(self) -> "pymupdf.Document":
+        """Opens the PDF on first use and returns the cached document."""
+        if self._doc is None:
+            import pymupdf
+
+            self._doc = pymupdf.open(self._pdf_str)
+        return self._doc
+
+    def _get_first_page_text(self) -> str:
+        """Extracts the text of the first page of the PDF only once."""
+        if self._first_page_text is None:
+            self._first_page_text = self._get_document()[0].get_text("text")
+        return self._first_page_text
 
     def _extract_doi_from_pdf(self):
         """Extracts DOI from the PDF's metadata or text."""
-        doc = pymupdf.open(str(self._pdf_path.resolve()))
+        doc = self._get_document()
 
         # First try to find DOI in metadata (if available)
         metadata = doc.metadata
@@ -121,10 +166,18 @@ class MetadataExtractor:
         if "doi" in metadata:
             return metadata["doi"]
 
+        # The DOI is often hidden in another field (subject, keywords, ...)
+        for value in metadata.values():
+            if isinstance(value, str):
+                doi_match = DOI_RE.search(value)
+                if doi_match is not None:
+                    return doi_match.group(0)
+
         # Otherwise, extract text and search for DOI
-        first_page_text = doc[0].get_text("text")
-        self._logger.debug(f"First page text:\n{first_page_text}")
-        doi_match = re.findall(DOI_REGEXP, first_page_text)
+        first_page_text = self._get_first_page_text()
+        if self._logger.isEnabledFor(logging.DEBUG):
+            self._logger.debug(f"First page text:\n{first_page_text}")
+        doi_match = DOI_RE.findall(first_page_text)
         if len(doi_match) > 0:
             return doi_match[0]
 